@@ -1,8 +1,13 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+import os
+import tempfile
+from pathlib import Path
+from collections import namedtuple
+from numba import njit
+import pyarrow as pa
+from plotly.colors import qualitative
 
 # Page configuration with custom theme
 st.set_page_config(
@@ -15,190 +20,338 @@ st.set_page_config(
 if 'favorites' not in st.session_state:
     st.session_state.favorites = set()
 
-@st.cache_data
+CSV_PATH = Path('NewPeanut.csv')
+ARROW_PATH = Path('NewPeanut.arrow')
+# Cache file written by earlier versions of the app
+OLD_PARQUET_PATH = Path('NewPeanut.parquet')
+
+# Only the columns the app actually reads
+USED_COLUMNS = [
+    'title', 'rating', 'meal_type', 'calories', 'protein', 'fat',
+    'Vegetarian', 'Vegan', 'Gluten-Free', 'Peanut-Free'
+]
+
+DIETARY_COLUMNS = ['Vegetarian', 'Vegan', 'Gluten-Free', 'Peanut-Free']
+NUTRITION_COLUMNS = ['calories', 'protein', 'fat']
+# Rows sent to the results table per page
+PAGE_SIZE = 200
+# Bit position of each dietary flag in the packed per-recipe byte
+DIET_BITS = {name: i for i, name in enumerate(DIETARY_COLUMNS)}
+
+# Chart styling shared by every render
+PIE_LAYOUT = dict(
+    title_text='Meal Type Distribution',
+    showlegend=False,
+    title_x=0.5,
+    title_font_size=20,
+    height=400
+)
+RATING_LAYOUT = dict(
+    title_text='Rating Distribution',
+    xaxis_title="Rating",
+    yaxis_title="Number of Recipes",
+    bargap=0.1,
+    title_x=0.5,
+    title_font_size=20,
+    height=400
+)
+NUTRI_LAYOUT = dict(
+    title={
+        'text': "Average Nutritional Content",
+        'x': 0.5,
+        'font_size': 20
+    },
+    xaxis_title="Nutrient",
+    yaxis_title="Amount (g/serving)",
+    height=400,
+    showlegend=False
+)
+RATING_COLOR = '#FF4B4B'
+NUTRI_COLORS = ['#FF9B9B', '#FFB4B4', '#FFCECE']
+PIE_COLORS = qualitative.Pastel
+
+# On-disk layout of the Arrow cache: already in the form the filters read, so
+# every numeric column maps straight to a NumPy array without a copy
+CACHE_SCHEMA = pa.schema([
+    ('title', pa.string()),
+    ('rating', pa.float32()),
+    ('meal_type', pa.dictionary(pa.int8(), pa.string())),
+    ('calories', pa.float32()),
+    ('protein', pa.float32()),
+    ('fat', pa.float32()),
+    ('diet_bits', pa.uint8()),
+])
+
+# DataFrame plus the arrays behind it that the filters work on directly
+RecipeData = namedtuple('RecipeData', [
+    'df', 'diet_bits', 'meal_codes', 'calories', 'ratings',
+    'nutrition'
+])
+
+def column(table, name):
+    chunked = table[name]
+    # The cache is written as one record batch, so its only chunk is the array
+    # in the mapped file; combine_chunks() would copy it onto the heap
+    if chunked.num_chunks == 1:
+        return chunked.chunk(0)
+    return chunked.combine_chunks()
+
+def build_recipe_data(table):
+    meal = column(table, 'meal_type')
+    meal_codes = meal.indices.to_numpy(zero_copy_only=True)
+    diet_bits = column(table, 'diet_bits').to_numpy(zero_copy_only=True)
+    calories = column(table, 'calories').to_numpy(zero_copy_only=True)
+    ratings = column(table, 'rating').to_numpy(zero_copy_only=True)
+    nutrition = tuple(
+        column(table, col).to_numpy(zero_copy_only=True) for col in NUTRITION_COLUMNS
+    )
+    # The frame wraps the same mapped buffers; its RangeIndex keeps row labels
+    # equal to row positions
+    df = pd.DataFrame({
+        'title': pd.arrays.ArrowExtensionArray(column(table, 'title')),
+        'rating': ratings,
+        'meal_type': pd.Categorical.from_codes(
+            meal_codes, categories=meal.dictionary.to_pylist(), validate=False
+        ),
+        'calories': calories,
+        'protein': nutrition[1],
+        'fat': nutrition[2],
+    }, copy=False)
+    return RecipeData(
+        df, diet_bits, meal_codes, calories, ratings, nutrition
+    )
+
+@njit(cache=True)
+def _in_range(v, lo, hi):
+    # An unbounded range keeps NaNs, a bounded one drops them
+    if lo == -np.inf and hi == np.inf:
+        return True
+    return v >= lo and v <= hi
+
+@njit(cache=True)
+def _row_matches(i, diet_bits, diet_req, meal_codes, meal_target,
+                 calories, cal_lo, cal_hi, ratings, r_lo, r_hi):
+    if (diet_bits[i] & diet_req) != diet_req:
+        return False
+    if meal_target >= 0 and meal_codes[i] != meal_target:
+        return False
+    return _in_range(calories[i], cal_lo, cal_hi) and _in_range(ratings[i], r_lo, r_hi)
+
+# Single-threaded on purpose: Streamlit runs sessions in parallel threads, and
+# Numba's fallback workqueue threading layer aborts the process when two
+# threads enter a parallel kernel at once. At ~20k rows prange gains nothing.
+@njit(cache=True)
+def _filter(diet_bits, diet_req, meal_codes, meal_target,
+            calories, cal_lo, cal_hi, ratings, r_lo, r_hi):
+    # Two passes: count matches, then write their indices into an exactly
+    # sized array. Returns the matching row positions in order.
+    n = calories.shape[0]
+
+    count = 0
+    for i in range(n):
+        if _row_matches(i, diet_bits, diet_req, meal_codes, meal_target,
+                        calories, cal_lo, cal_hi, ratings, r_lo, r_hi):
+            count += 1
+
+    out_idx = np.empty(count, dtype=np.int64)
+    pos = 0
+    for i in range(n):
+        if _row_matches(i, diet_bits, diet_req, meal_codes, meal_target,
+                        calories, cal_lo, cal_hi, ratings, r_lo, r_hi):
+            out_idx[pos] = i
+            pos += 1
+    return out_idx
+
+def build_cache_table():
+    raw = pd.read_csv(CSV_PATH, engine='pyarrow', usecols=USED_COLUMNS)
+    diet_bits = np.zeros(len(raw), dtype=np.uint8)
+    for name, bit in DIET_BITS.items():
+        diet_bits |= raw[name].to_numpy(dtype=np.uint8) << bit
+    columns = {
+        'title': pa.array(raw['title'], type=pa.string()),
+        # Small closed set of meal types -> compare dictionary codes instead of strings
+        'meal_type': pa.array(raw['meal_type'].str.strip().str.title(), type=pa.string())
+            .dictionary_encode().cast(CACHE_SCHEMA.field('meal_type').type),
+        'diet_bits': pa.array(diet_bits),
+    }
+    # float32 halves the bytes every mask and reduction has to read; calories
+    # holds NaNs and values beyond the int16 range, so it stays floating point.
+    # from_pandas=False keeps NaN as a value rather than a null, which is what
+    # lets the column be viewed as a NumPy array in place
+    for col in ['rating'] + NUTRITION_COLUMNS:
+        values = pd.to_numeric(raw[col], errors='coerce').to_numpy(dtype=np.float32)
+        columns[col] = pa.array(values, from_pandas=False)
+    table = pa.table([columns[name] for name in CACHE_SCHEMA.names], schema=CACHE_SCHEMA)
+    return table.combine_chunks()
+
+def write_arrow_cache(table):
+    # Uncompressed and a single record batch, so each column is one mappable
+    # buffer. Written to a temp file and renamed into place, so a crash mid-write
+    # never leaves a truncated cache behind
+    fd, tmp_path = tempfile.mkstemp(
+        dir=ARROW_PATH.parent, prefix=ARROW_PATH.name + '.', suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'wb') as sink, pa.ipc.new_file(sink, CACHE_SCHEMA) as writer:
+            writer.write_table(table)
+        # mkstemp creates the file 0600; give it the mode a plain open() would,
+        # so workers running as other users can read the shared cache
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, ARROW_PATH)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    OLD_PARQUET_PATH.unlink(missing_ok=True)
+
+def arrow_cache_is_stale():
+    if not ARROW_PATH.exists():
+        return True
+    # Without the CSV there is nothing to rebuild from; the cache is the data
+    if not CSV_PATH.exists():
+        return False
+    return ARROW_PATH.stat().st_mtime < CSV_PATH.stat().st_mtime
+
+def read_arrow_cache():
+    return pa.ipc.open_file(pa.memory_map(str(ARROW_PATH), 'r')).read_all()
+
+def load_arrow_cache():
+    if not arrow_cache_is_stale():
+        try:
+            table = read_arrow_cache()
+            if table.schema.equals(CACHE_SCHEMA):
+                return table
+            # Otherwise written by an older version of the app
+        except (pa.ArrowInvalid, OSError):
+            pass
+    table = build_cache_table()
+    try:
+        write_arrow_cache(table)
+        return read_arrow_cache()
+    except OSError:
+        # e.g. a read-only app directory: serve the table built in memory
+        return table
+
+# cache_resource shares one frame across sessions instead of handing each
+# session its own unpickled copy; nothing downstream mutates it
+@st.cache_resource
 def load_data():
     try:
-        data = pd.read_csv('NewPeanut.csv')
-        return data
+        table = load_arrow_cache()
+        # The arrays stay backed by the memory map, so the OS pages columns in
+        # on demand and processes reading the same file share physical pages
+        return build_recipe_data(table)
     except FileNotFoundError:
         st.error("CSV file not found. Please check if 'NewPeanut.csv' is in the correct directory.")
-        return pd.DataFrame()
+        return build_recipe_data(CACHE_SCHEMA.empty_table())
 
-def filter_recipes(df, dietary_restrictions, meal_type, rating_range, calories_range):
-    if df.empty:
-        return df
+def change_page(step):
+    st.session_state['page'] += step
 
-    filtered_df = df.copy()
+# Keyed on the filter arguments only; the underscored data argument is not hashed
+@st.cache_data(max_entries=64)
+def filter_recipes(_data, dietary_restrictions, meal_type, rating_range, calories_range):
+    # Returns the matching rows and their row positions in the full frame
+    df = _data.df
+    no_rows = np.empty(0, dtype=np.int64)
+    if df.empty:
+        return df, no_rows
 
-    if dietary_restrictions:
-        filtered_df = filtered_df[filtered_df[dietary_restrictions].all(axis=1)]
+    diet_req = np.uint8(sum(1 << DIET_BITS[r] for r in dietary_restrictions or ()))
 
+    meal_target = -1
     if meal_type and meal_type != 'Any':
-        filtered_df = filtered_df[filtered_df['meal_type'].str.contains(meal_type, case=False, na=False)]
-
-    if calories_range:
-        filtered_df = filtered_df[
-            (filtered_df['calories'] >= calories_range[0]) & 
-            (filtered_df['calories'] <= calories_range[1])
-        ]
-
-    if rating_range:
-        filtered_df = filtered_df[
-            (filtered_df['rating'] >= rating_range[0]) & 
-            (filtered_df['rating'] <= rating_range[1])
-        ]
-
-    return filtered_df
-
-def plot_meal_distribution(df):
-    fig = px.pie(
-        df, 
-        names='meal_type', 
-        title='Meal Type Distribution',
-        color_discrete_sequence=px.colors.qualitative.Pastel,
-        hole=0.4
+        categories = df['meal_type'].cat.categories
+        if meal_type not in categories:
+            return df.iloc[no_rows], no_rows
+        meal_target = categories.get_loc(meal_type)
+
+    cal_lo, cal_hi = calories_range if calories_range else (-np.inf, np.inf)
+    r_lo, r_hi = rating_range if rating_range else (-np.inf, np.inf)
+
+    out_idx = _filter(
+        _data.diet_bits, diet_req, _data.meal_codes, meal_target,
+        _data.calories, float(cal_lo), float(cal_hi),
+        _data.ratings, float(r_lo), float(r_hi)
     )
+    return df.iloc[out_idx], out_idx
+
+# Figures are cached on the content of the columns they plot, so reruns with
+# the same filter result skip rebuilding and serialising them
+@st.cache_data(max_entries=32)
+def plot_meal_distribution(meal_types):
+    # Plotly is imported on first plot so it stays off the cold-start path
+    import plotly.graph_objects as go
+
+    # Send per-meal-type counts rather than one record per recipe
+    counts = meal_types.value_counts()
+    counts = counts[counts > 0]
+    fig = go.Figure(data=[
+        go.Pie(
+            labels=counts.index.tolist(),
+            values=counts.values.tolist(),
+            marker_colors=PIE_COLORS,
+            hole=0.4
+        )
+    ])
     fig.update_traces(textposition='inside', textinfo='percent+label')
-    fig.update_layout(
-        showlegend=False,
-        title_x=0.5,
-        title_font_size=20,
-        height=400
-    )
+    fig.update_layout(**PIE_LAYOUT)
     return fig
 
-def plot_rating_distribution(df):
-    fig = px.histogram(
-        df, 
-        x='rating',
-        title='Rating Distribution',
-        nbins=20,
-        color_discrete_sequence=['#FF4B4B'],
-        opacity=0.7
-    )
-    fig.update_layout(
-        xaxis_title="Rating",
-        yaxis_title="Number of Recipes",
-        bargap=0.1,
-        title_x=0.5,
-        title_font_size=20,
-        height=400
-    )
+@st.cache_data(max_entries=32)
+def plot_rating_distribution(ratings):
+    import plotly.graph_objects as go
+
+    # Bin on the server so the figure carries 20 bars instead of every rating
+    counts, edges = np.histogram(ratings, bins=20, range=(0, 5))
+    fig = go.Figure(data=[
+        go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=np.diff(edges),
+            marker_color=RATING_COLOR,
+            opacity=0.7
+        )
+    ])
+    fig.update_layout(**RATING_LAYOUT)
     return fig
 
-def plot_nutrition_comparison(df):
-    avg_nutrition = df[['calories', 'protein', 'fat']].mean()
+@st.cache_data(max_entries=32)
+def plot_nutrition_comparison(_nutrition, idx):
+    import plotly.graph_objects as go
+
+    # Keyed on the filter-result row positions. Like pandas' mean, NaNs are
+    # skipped and an all-NaN column averages to NaN without a warning
+    avg_nutrition = np.full(len(_nutrition), np.nan)
+    for i, col in enumerate(_nutrition):
+        values = col[idx]
+        count = np.count_nonzero(~np.isnan(values))
+        if count:
+            avg_nutrition[i] = np.nansum(values, dtype=np.float64) / count
     fig = go.Figure(data=[
         go.Bar(
-            x=avg_nutrition.index,
-            y=avg_nutrition.values,
-            marker_color=['#FF9B9B', '#FFB4B4', '#FFCECE'],
-            text=avg_nutrition.values.round(1),
+            x=NUTRITION_COLUMNS,
+            y=avg_nutrition,
+            marker_color=NUTRI_COLORS,
+            text=avg_nutrition.round(1),
             textposition='auto',
         )
     ])
-    fig.update_layout(
-        title={
-            'text': "Average Nutritional Content",
-            'x': 0.5,
-            'font_size': 20
-        },
-        xaxis_title="Nutrient",
-        yaxis_title="Amount (g/serving)",
-        height=400,
-        showlegend=False
-    )
+    fig.update_layout(**NUTRI_LAYOUT)
     return fig
 
 def main():
-    # Custom CSS for enhanced UI
-    st.markdown("""
-    <style>
-    /* Main theme colors and fonts */
-    :root {
-        --primary-color: #FF4B4B;
-        --secondary-color: #FF6B6B;
-        --background-color: #FFFFFF;
-        --text-color: #333333;
-    }
-
-    /* Header styling */
-    .main-header {
-        font-size: 3.5rem !important;
-        font-weight: bold;
-        color: var(--primary-color);
-        text-align: center;
-        padding: 2rem 0;
-        margin-bottom: 2rem;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-    }
-
-    /* Subheader styling */
-    .subheader {
-        font-size: 1.5rem;
-        color: #666;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-
-    /* Card styling */
-    .recipe-card {
-        background-color: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        margin-bottom: 1rem;
-        transition: transform 0.3s ease;
-    }
-    .recipe-card:hover {
-        transform: translateY(-5px);
-    }
-
-    /* Button styling */
-    .stButton>button {
-        width: 100%;
-        height: 3em;
-        background-color: var(--primary-color);
-        color: white;
-        font-size: 18px;
-        font-weight: bold;
-        border: none;
-        border-radius: 5px;
-        transition: all 0.3s ease;
-    }
-    .stButton>button:hover {
-        background-color: var(--secondary-color);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-    }
-
-    /* Metric container styling */
-    .metric-container {
-        background-color: #f8f9fa;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-    }
-
-    /* Sidebar styling */
-    [data-testid="stSidebar"][aria-expanded="true"] {
-        min-width: 300px;
-        max-width: 400px;
-        padding: 2rem 1rem;
-    }
-
-    /* DataFrame styling */
-    .dataframe {
-        font-size: 14px !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Custom CSS for enhanced UI, served as a static file the browser can cache
+    st.markdown('<link rel="stylesheet" href="app/static/style.css">', unsafe_allow_html=True)
 
     # Main header
     st.markdown('<p class="main-header">🍲 NutriMeal Navigator</p>', unsafe_allow_html=True)
     st.markdown('<p class="subheader">Discover recipes tailored to your dietary preferences</p>', unsafe_allow_html=True)
 
     # Load data
-    df = load_data()
+    data = load_data()
+    df = data.df
     if df.empty:
         st.stop()
 
@@ -240,15 +393,31 @@ def main():
         submit_button = st.button('Find Recipes 🔍')
 
     # Main content
-    if submit_button:
-        with st.spinner('Finding your perfect recipes...'):
-            filtered_df = filter_recipes(
-                df, 
-                dietary_restrictions, 
-                meal_type,
-                rating_range,
-                calories_range
-            )
+    filter_key = (
+        tuple(sorted(dietary_restrictions)),
+        meal_type,
+        tuple(rating_range),
+        tuple(calories_range)
+    )
+    # Reruns with unchanged filters reuse the last search instead of recomputing it
+    cached = st.session_state.get('last_key') == filter_key
+    if submit_button or cached:
+        if cached:
+            filtered_idx, figs = st.session_state['last_result']
+            filtered_df = df.iloc[filtered_idx]
+        else:
+            with st.spinner('Finding your perfect recipes...'):
+                filtered_df, filtered_idx = filter_recipes(data, *filter_key)
+                figs = None
+                if not filtered_df.empty:
+                    figs = (
+                        plot_meal_distribution(filtered_df['meal_type']),
+                        plot_rating_distribution(filtered_df['rating'].to_numpy()),
+                        plot_nutrition_comparison(data.nutrition, filtered_idx)
+                    )
+            st.session_state['last_key'] = filter_key
+            st.session_state['last_result'] = (filtered_idx, figs)
+            st.session_state['page'] = 0
 
         if not filtered_df.empty:
             st.success(f"Found {len(filtered_df)} matching recipes!")
@@ -257,12 +426,15 @@ def main():
             col1, col2 = st.columns([2, 1])
             with col1:
                 st.markdown("### 📋 Recipe Results")
-                recipe_df = filtered_df[['title', 'rating', 'meal_type', 'calories']].copy()
-                recipe_df['rating'] = recipe_df['rating'].round(2)
+                recipe_df = filtered_df.loc[:, ['title', 'rating', 'meal_type', 'calories']]
+
+                # Only the current page is sent to the browser
+                page = st.session_state.setdefault('page', 0)
+                n_pages = (len(recipe_df) - 1) // PAGE_SIZE + 1
                 
                 # Enhanced dataframe display
                 st.dataframe(
-                    recipe_df,
+                    recipe_df.iloc[page * PAGE_SIZE:(page + 1) * PAGE_SIZE],
                     column_config={
                         "title": st.column_config.TextColumn("Recipe Name", width="large"),
                         "rating": st.column_config.NumberColumn("Rating", format="%.2f ⭐"),
@@ -273,11 +445,31 @@ def main():
                     height=400
                 )
 
+                if n_pages > 1:
+                    prev_col, page_col, next_col = st.columns([1, 2, 1])
+                    with prev_col:
+                        st.button(
+                            f"Previous {PAGE_SIZE}", on_click=change_page, args=(-1,),
+                            disabled=page == 0
+                        )
+                    with page_col:
+                        st.caption(f"Page {page + 1} of {n_pages}")
+                    with next_col:
+                        st.button(
+                            f"Next {PAGE_SIZE}", on_click=change_page, args=(1,),
+                            disabled=page >= n_pages - 1
+                        )
+
             with col2:
                 st.markdown("### 📊 Recipe Statistics")
                 
                 # Metrics in cards
                 with st.container():
+                    st.metric(
+                        "Matching Recipes",
+                        f"{len(filtered_df):,}",
+                        help="Total number of recipes matching your filters"
+                    )
                     st.metric(
                         "Average Rating",
                         f"{filtered_df['rating'].mean():.2f} ⭐",
@@ -294,11 +486,11 @@ def main():
             st.markdown("### 📈 Recipe Analytics")
             viz_col1, viz_col2 = st.columns(2)
             with viz_col1:
-                st.plotly_chart(plot_meal_distribution(filtered_df), use_container_width=True)
+                st.plotly_chart(figs[0], use_container_width=True)
             with viz_col2:
-                st.plotly_chart(plot_rating_distribution(filtered_df), use_container_width=True)
+                st.plotly_chart(figs[1], use_container_width=True)
 
-            st.plotly_chart(plot_nutrition_comparison(filtered_df), use_container_width=True)
+            st.plotly_chart(figs[2], use_container_width=True)
 
         else:
             st.error("No recipes found matching your criteria. Try adjusting your filters!")